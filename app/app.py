@@ -12,6 +12,8 @@ from flask_cors import CORS
 import sqlite3
 import base64
 import io
+import json
+import os
 from PIL import Image
 
 app = Flask(__name__)
@@ -37,6 +39,8 @@ OCCLUSION_TIMEOUT = 1000.0
 LAYER_DEPTH_THRESHOLD = 0.7
 RECOVERY_FRAMES = 5
 MAX_LAYERS = 5
+# Ruta a un JSON con detecciones grabadas; si se define, reemplaza a YOLO (pruebas de carga)
+REPLAY_DETECTIONS_PATH = os.environ.get("REPLAY_DETECTIONS")
 
 class ProductState(Enum):
     DETECTING = "detecting"
@@ -511,7 +515,24 @@ class LayeredShoppingCart:
             'pending_products': pending_products
         }
 
+class ReplayDetector:
+    def __init__(self, path: str):
+        with open(path) as f:
+            self.frames: List[List[Tuple]] = [[tuple(d) for d in frame] for frame in json.load(f)]
+        if not self.frames:
+            raise ValueError(f"{path} no contiene detecciones")
+        self.index = 0
+
+    def next_detections(self) -> List[Tuple]:
+        detections = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return detections
+
 def get_detections(frame, model, min_conf):
+    if isinstance(model, ReplayDetector):
+        return [(cls_name, int(x1), int(y1), int(x2), int(y2), float(conf))
+                for cls_name, x1, y1, x2, y2, conf in model.next_detections()
+                if conf >= min_conf and cls_name != EXCLUDED_CLASS]
     results = model.predict(source=frame, save=False, verbose=False)[0]
     detections = []
     for box in results.boxes:
@@ -575,7 +596,7 @@ def init_db():
 
 init_db()
 
-model = YOLO(MODEL_PATH)
+model = ReplayDetector(REPLAY_DETECTIONS_PATH) if REPLAY_DETECTIONS_PATH else YOLO(MODEL_PATH)
 cart = LayeredShoppingCart()
 frame_count = 0
 show_occluded = True
@@ -656,8 +677,11 @@ def handle_frame(data):
                 })
     conn.close()
 
-    # Emit response to client
-    emit('update', {'products': response, 'total': total})
+    # Emit response to client (echo 'seq' so load tests can match frames to updates)
+    update = {'products': response, 'total': total}
+    if 'seq' in data:
+        update['seq'] = data['seq']
+    emit('update', update)
 
 if __name__ == '__main__':
     socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,332 @@
+"""Generador de carga Socket.IO para el backend del carrito.
+
+Simula N carriles (clientes) que se comportan como WebcamFeed.js: envían frames
+JPEG en base64 por el evento 'frame' a una tasa fija, sin esperar respuesta, y
+mide el tiempo hasta el 'update' correspondiente. Para cada cantidad de carriles
+levanta app.py en un proceso aparte y reporta latencia p50/p95/p99, frames sin
+respuesta y uso de CPU del servidor.
+
+Ejemplo (detector simulado, sin YOLO):
+
+    cd app
+    python loadtest.py --source ../videos/carrito.mp4 --lanes 1,2,4,8 \\
+        --replay-detections loadtest_detections.json --slo-ms 250
+"""
+import argparse
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+import psutil
+import socketio
+
+APP_DIR = Path(__file__).resolve().parent
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+JPEG_QUALITY = 80  # canvas.toDataURL('image/jpeg', 0.8) en WebcamFeed.js
+SEND_INTERVAL = 0.05  # setInterval(..., 50) en WebcamFeed.js
+SERVER_START_TIMEOUT = 120.0
+CPU_SAMPLE_INTERVAL = 0.5
+
+def read_video(path: Path) -> Iterator[np.ndarray]:
+    capture = cv2.VideoCapture(str(path))
+    try:
+        while True:
+            ok, image = capture.read()
+            if not ok:
+                break
+            yield image
+    finally:
+        capture.release()
+
+def read_images(folder: Path) -> Iterator[np.ndarray]:
+    for path in sorted(folder.iterdir()):
+        if path.suffix.lower() in IMAGE_EXTENSIONS:
+            image = cv2.imread(str(path))
+            if image is not None:
+                yield image
+
+def load_frames(source: str, max_frames: int) -> List[str]:
+    # Se codifican antes de la prueba para que el cliente no compita por CPU
+    path = Path(source)
+    images = read_images(path) if path.is_dir() else read_video(path)
+    frames = []
+    for image in images:
+        ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if ok:
+            frames.append('data:image/jpeg;base64,' + base64.b64encode(buffer.tobytes()).decode('ascii'))
+        if len(frames) >= max_frames:
+            break
+    if not frames:
+        raise SystemExit(f"No se pudieron leer frames de {source}")
+    return frames
+
+class Lane:
+    def __init__(self, lane_id: int, url: str, frames: List[str], interval: float):
+        self.lane_id = lane_id
+        self.url = url
+        self.frames = frames
+        self.interval = interval
+        self.sent_at: Dict[int, float] = {}
+        self.latency_ms: Dict[int, float] = {}
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('update', self.on_update)
+
+    def connect(self):
+        self.client.connect(self.url, transports=['websocket'], wait_timeout=10)
+
+    def disconnect(self):
+        if self.client.connected:
+            self.client.disconnect()
+
+    def on_update(self, data):
+        received = time.perf_counter()
+        seq = data.get('seq')
+        sent = self.sent_at.get(seq)
+        if sent is not None and seq not in self.latency_ms:
+            self.latency_ms[seq] = (received - sent) * 1000
+
+    def run(self, stop_event: threading.Event, start_offset: float):
+        if stop_event.wait(start_offset):
+            return
+        seq = 0
+        next_send = time.perf_counter()
+        while not stop_event.is_set():
+            self.sent_at[seq] = time.perf_counter()
+            try:
+                self.client.emit('frame', {'image': self.frames[seq % len(self.frames)], 'seq': seq})
+            except socketio.exceptions.SocketIOError:
+                del self.sent_at[seq]
+                print(f"Carril {self.lane_id}: conexión perdida", file=sys.stderr)
+                break
+            seq += 1
+            next_send += self.interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                stop_event.wait(delay)
+            else:
+                # Como setInterval, los ticks atrasados no se recuperan en ráfaga
+                next_send = time.perf_counter()
+
+class CpuSampler(threading.Thread):
+    def __init__(self, pid: int):
+        super().__init__(daemon=True)
+        self.process = psutil.Process(pid)
+        self.samples: List[float] = []
+        self.stop_event = threading.Event()
+
+    def run(self):
+        try:
+            self.process.cpu_percent(None)
+            while not self.stop_event.wait(CPU_SAMPLE_INTERVAL):
+                self.samples.append(self.process.cpu_percent(None))
+        except psutil.NoSuchProcess:
+            pass
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+def find_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int, replay_detections: Optional[str]) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.pop('REPLAY_DETECTIONS', None)
+    if replay_detections:
+        env['REPLAY_DETECTIONS'] = str(Path(replay_detections).resolve())
+    # stdout descartado: handle_frame imprime el estado del carrito en cada frame
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), '--serve', '--port', str(port)],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"El servidor terminó al iniciar (código {process.returncode})")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.5)
+    stop_server(process)
+    raise SystemExit(f"El servidor no respondió en {SERVER_START_TIMEOUT:.0f}s")
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def serve(port: int):
+    import app as server
+    server.socketio.run(server.app, host='127.0.0.1', port=port, log_output=False, allow_unsafe_werkzeug=True)
+
+def pending_updates(lanes: List[Lane], measure_from: float) -> int:
+    return sum(1 for lane in lanes for seq, sent_time in list(lane.sent_at.items())
+               if sent_time >= measure_from and seq not in lane.latency_ms)
+
+def percentile_or_none(values: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(values, q)) if values else None
+
+def run_scenario(num_lanes: int, frames: List[str], args) -> Dict:
+    process = None
+    sampler = None
+    url = args.url
+    if url is None:
+        port = args.port or find_free_port()
+        process = start_server(port, args.replay_detections)
+        url = f"http://127.0.0.1:{port}"
+
+    interval = 1.0 / args.fps
+    lanes = [Lane(i, url, frames, interval) for i in range(num_lanes)]
+    stop_event = threading.Event()
+    server_exit_code = None
+    try:
+        for lane in lanes:
+            lane.connect()
+        # Desfase entre carriles para no enviar todos los frames en el mismo instante
+        threads = [threading.Thread(target=lane.run, args=(stop_event, interval * i / num_lanes), daemon=True)
+                   for i, lane in enumerate(lanes)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        stop_event.wait(args.warmup)
+        # Solo cuentan los frames enviados después del calentamiento
+        measure_from = start + args.warmup
+        if process is not None:
+            sampler = CpuSampler(process.pid)
+            sampler.start()
+        stop_event.wait(args.duration)
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+        # La CPU se mide solo mientras llegan frames, no durante la espera de respuestas
+        if sampler is not None:
+            sampler.stop()
+        drain_deadline = time.perf_counter() + args.drain
+        while time.perf_counter() < drain_deadline and pending_updates(lanes, measure_from):
+            if process is not None and process.poll() is not None:
+                break
+            time.sleep(0.1)
+    finally:
+        stop_event.set()
+        for lane in lanes:
+            lane.disconnect()
+        if process is not None:
+            server_exit_code = process.poll()
+            stop_server(process)
+    if server_exit_code is not None:
+        print(f"El servidor terminó durante la prueba con {num_lanes} carril(es) "
+              f"(código {server_exit_code})", file=sys.stderr)
+
+    sent = 0
+    latencies = []
+    for lane in lanes:
+        for seq, sent_time in lane.sent_at.items():
+            if sent_time < measure_from:
+                continue
+            sent += 1
+            if seq in lane.latency_ms:
+                latencies.append(lane.latency_ms[seq])
+    unanswered = sent - len(latencies)
+    p95 = percentile_or_none(latencies, 95)
+    unanswered_rate = unanswered / sent if sent else 1.0
+    cpu = sampler.samples if sampler is not None and sampler.samples else None
+    return {
+        'lanes': num_lanes,
+        'sent': sent,
+        'received': len(latencies),
+        # Frames sin 'update' al terminar la espera (--drain): no distingue entre
+        # frames que el servidor no atendió y respuestas que llegaron tarde
+        'unanswered_within_drain': unanswered,
+        'unanswered_rate': unanswered_rate,
+        'updates_per_second': len(latencies) / args.duration,
+        'p50_ms': percentile_or_none(latencies, 50),
+        'p95_ms': p95,
+        'p99_ms': percentile_or_none(latencies, 99),
+        'cpu_mean_percent': float(np.mean(cpu)) if cpu else None,
+        'cpu_max_percent': float(np.max(cpu)) if cpu else None,
+        'server_exit_code': server_exit_code,
+        'slo_ok': (server_exit_code is None and p95 is not None and p95 <= args.slo_ms
+                   and unanswered_rate <= args.max_unanswered_rate),
+    }
+
+def format_value(value: Optional[float], decimals: int = 0) -> str:
+    return f"{value:.{decimals}f}" if value is not None else "-"
+
+def print_report(results: List[Dict], args):
+    print(f"\n=== Prueba de carga: {args.fps:g} fps por carril, {args.duration:g}s, "
+          f"SLO p95 <= {args.slo_ms:g} ms y sin respuesta <= {args.max_unanswered_rate:.1%} ===")
+    print(f"Sin resp.: frames sin 'update' tras esperar {args.drain:g}s (--drain) al terminar el envío")
+    print(f"{'Carriles':>8} {'Enviados':>9} {'Sin resp.':>9} {'Upd/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'CPU %':>6} {'CPU max':>8}  SLO")
+    for r in results:
+        status = 'OK' if r['slo_ok'] else 'FALLA'
+        if r['server_exit_code'] is not None:
+            status += f" (servidor terminó, código {r['server_exit_code']})"
+        print(f"{r['lanes']:>8} {r['sent']:>9} {r['unanswered_within_drain']:>9} {r['updates_per_second']:>7.1f} "
+              f"{format_value(r['p50_ms'], 1):>8} {format_value(r['p95_ms'], 1):>8} {format_value(r['p99_ms'], 1):>8} "
+              f"{format_value(r['cpu_mean_percent']):>6} {format_value(r['cpu_max_percent']):>8}  {status}")
+    passing = [r['lanes'] for r in results if r['slo_ok']]
+    if passing:
+        print(f"Máximo de carriles que cumplen el SLO: {max(passing)}")
+    else:
+        print("Ninguna cantidad de carriles cumple el SLO")
+    print("=" * 40)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga Socket.IO para app.py")
+    parser.add_argument('--source', help="Video o carpeta de imágenes usada como cámara")
+    parser.add_argument('--lanes', default='1,2,4,8', help="Cantidades de carriles a probar, separadas por coma")
+    parser.add_argument('--fps', type=float, default=1.0 / SEND_INTERVAL, help="Frames por segundo por carril")
+    parser.add_argument('--duration', type=float, default=30.0, help="Segundos medidos por escenario")
+    parser.add_argument('--warmup', type=float, default=3.0, help="Segundos iniciales excluidos de la medición")
+    parser.add_argument('--drain', type=float, default=5.0, help="Segundos máximos de espera por respuestas pendientes")
+    parser.add_argument('--max-frames', type=int, default=300, help="Máximo de frames cargados de la fuente")
+    parser.add_argument('--replay-detections', help="JSON con detecciones grabadas en lugar de YOLO")
+    parser.add_argument('--slo-ms', type=float, default=250.0, help="Latencia p95 máxima aceptable")
+    parser.add_argument('--max-unanswered-rate', type=float, default=0.01,
+                        help="Fracción máxima de frames sin 'update' al terminar --drain")
+    parser.add_argument('--url', help="Usar un servidor ya iniciado (no se mide CPU)")
+    parser.add_argument('--port', type=int, help="Puerto del servidor local (por defecto uno libre)")
+    parser.add_argument('--output', help="Guardar resultados en JSON")
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if not args.serve and not args.source:
+        parser.error("--source es obligatorio")
+    if args.url and args.replay_detections:
+        parser.error("--replay-detections solo aplica al servidor local; inicia el servidor con REPLAY_DETECTIONS")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        serve(args.port)
+        return
+
+    frames = load_frames(args.source, args.max_frames)
+    print(f"{len(frames)} frames cargados de {args.source}")
+    results = []
+    for num_lanes in (int(n) for n in args.lanes.split(',')):
+        print(f"Probando {num_lanes} carril(es)...")
+        results.append(run_scenario(num_lanes, frames, args))
+    print_report(results, args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, allow_nan=False)
+
+if __name__ == '__main__':
+    main()